@@ -0,0 +1,60 @@
+"""Compares the former regex scan of the authors list with the authors name index,
+on a synthetic catalog built from the authors stub. Run it from the repository's root with
+
+    python3 -m benchmarks.author_search
+"""
+import re
+from random import Random
+from time import perf_counter
+from timeit import repeat
+
+from models.search import NameIndex
+from models.stubs import AUTHOR_LIST_STUB
+
+CATALOG_SIZE = 300000
+QUERIES = ["Emile", "zola", "victor h", "de la", "Apolinaire", "proust marcel", "a", "a m"]
+MISSPELLED_QUERIES = [("Apolinaire", "Apollinaire"), ("Guillaume Apolinaire", "Apollinaire"),
+                      ("Flobert", "Flaubert"), ("Maupasant", "Maupassant")]
+REPEAT = 5
+
+
+def build_catalog():
+    """Shuffles first names and last names of the stub's authors into new authors"""
+    random = Random(42)
+    first_names = [author["name"].split(" ")[0] for author in AUTHOR_LIST_STUB]
+    last_names = [" ".join(author["name"].split(" ")[1:]) or author["name"] for author in AUTHOR_LIST_STUB]
+    return {i : "%s %s %i" % (random.choice(first_names), random.choice(last_names), i)
+            for i in range(CATALOG_SIZE)}
+
+
+def regex_scan(authors, query_str):
+    return [{"id" : author_id, "name" : name} for author_id, name in authors.items()
+            if re.search(query_str, name, re.IGNORECASE)]
+
+
+def best_time(func, number):
+    return min(repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def main():
+    authors = build_catalog()
+    start = perf_counter()
+    index = NameIndex(authors)
+    print("%i authors, index built in %.2fs" % (len(authors), perf_counter() - start))
+
+    print("%-15s %14s %14s %10s" % ("query", "regex (us)", "index (us)", "results"))
+    for query in QUERIES:
+        regex_time = best_time(lambda: regex_scan(authors, query), 1) * 1e6
+        index_time = best_time(lambda: index.search(query), 100) * 1e6
+        print("%-15s %14.1f %14.1f %10i" % (query, regex_time, index_time, len(index.search(query))))
+
+    # the typo tolerance has to hold at this scale, where the most common trigrams aren't indexed
+    for misspelled_query, surname in MISSPELLED_QUERIES:
+        results = index.search(misspelled_query)
+        assert results and all(surname in name for author_id, name in results[:10]), \
+            "%s not found for %r" % (surname, misspelled_query)
+    print("misspelled surnames found: %s" % ", ".join(repr(query) for query, surname in MISSPELLED_QUERIES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Compares flask-restful's default json encoding with the API's json representation,
+on response shapes mimicking the real ones. Run it from the repository's root with
+
+    python3 -m benchmarks.json_serialization
+"""
+import gzip
+import json
+from timeit import repeat
+
+from handlers.representations import fast_dumps, std_dumps, COMPRESSORS, GZIP_LEVEL
+from models.stubs import AUTHOR_LIST_STUB, WORD_CLOUD_STUBS, DASHBOARD_STATS_STUB, ADVANCED_STATS_STUB
+
+REPEAT = 5
+
+
+def restful_dumps(data):
+    """What flask-restful's default 'application/json' representation does"""
+    return (json.dumps(data) + "\n").encode("utf-8")
+
+
+def build_shapes():
+    words = [word.lower() + str(i) for i in range(2000) for word in WORD_CLOUD_STUBS]
+    authors = [{"id" : i, "name" : "%s %i" % (author["name"], i)}
+               for i, author in enumerate(AUTHOR_LIST_STUB * 200)]
+    return {
+        "dashboard" : DASHBOARD_STATS_STUB,
+        "statistics" : ADVANCED_STATS_STUB,
+        "word-cloud" : WORD_CLOUD_STUBS,
+        "authors (10k)" : authors,
+        "words (40k)" : words,
+        "facets" : {"authors" : [dict(author, count=i % 50 + 1) for i, author in enumerate(authors)],
+                    "genres" : [dict(author, count=i % 50 + 1) for i, author in enumerate(authors[:500])]},
+    }
+
+
+def best_time(func, data, number):
+    return min(repeat(lambda: func(data), number=number, repeat=REPEAT)) / number
+
+
+def main():
+    print("%-15s %10s %12s %12s %12s | %10s %10s %10s" % ("shape", "size (B)", "restful (us)", "std (us)",
+                                                           "fast (us)", "gzip (us)", "gzip (B)",
+                                                           "br (B)" if "br" in COMPRESSORS else ""))
+    for name, data in build_shapes().items():
+        body = fast_dumps(data)
+        assert json.loads(body) == json.loads(restful_dumps(data))
+        number = max(1, 200000 // len(body))
+        timings = [best_time(dumps, data, number) * 1e6 for dumps in (restful_dumps, std_dumps, fast_dumps)]
+        gzip_time = best_time(lambda b: gzip.compress(b, compresslevel=GZIP_LEVEL), body, number) * 1e6
+        gzip_size = len(COMPRESSORS["gzip"](body))
+        br_size = len(COMPRESSORS["br"](body)) if "br" in COMPRESSORS else ""
+        print("%-15s %10i %12.1f %12.1f %12.1f | %10.1f %10i %10s" % ((name, len(body)) + tuple(timings)
+                                                                     + (gzip_time, gzip_size, br_size)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""Replays a mix of requests on the API's nine routes at a target rate, and reports the throughput
+and the p50/p95/p99 latencies of each route. Run it from the repository's root with
+
+    python3 -m benchmarks.load_test --rate 50 --duration 30
+    python3 -m benchmarks.load_test --url http://localhost:5000 --mix dashboard=5,words=10
+
+By default, the Flask app is driven in-process through its WSGI callable, using the database set in
+models/db_address.txt (a local Mongo, or a stand-in); with --url, requests go to a running server.
+Latencies are measured from the time each request was scheduled, so that a saturated server shows up
+as growing latencies instead of a lower request rate.
+"""
+import gzip
+import json
+import threading
+from argparse import ArgumentParser
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from random import Random
+from time import perf_counter, sleep
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import numpy as np
+
+ACCEPT_ENCODING = "gzip"
+DEFAULT_MIX = {"date_brackets" : 1, "genres" : 1, "authors" : 10, "dashboard" : 4, "statistics" : 2,
+               "word-cloud" : 2, "facets" : 2, "words" : 10, "semantic-fields" : 1}
+
+argparser = ArgumentParser(description=__doc__)
+argparser.add_argument("--url", default=None, help="base url of a running server (in-process if not set)")
+argparser.add_argument("--rate", type=float, default=20, help="target requests per second, all routes included")
+argparser.add_argument("--duration", type=float, default=30, help="duration of the test, in seconds")
+argparser.add_argument("--concurrency", type=int, default=16, help="number of concurrent clients")
+argparser.add_argument("--mix", default=None,
+                       help="routes weights, e.g. 'dashboard=5,words=10' (defaults to %s)"
+                            % ",".join("%s=%i" % item for item in DEFAULT_MIX.items()))
+argparser.add_argument("--seed", type=int, default=0)
+
+
+class InProcessClient(object):
+    """Sends the requests to the app's WSGI callable, with one werkzeug test client per thread"""
+
+    def __init__(self):
+        from main import app
+        self.app = app
+        self.local = threading.local()
+
+    def get(self, path, params):
+        try:
+            client = self.local.client
+        except AttributeError:
+            client = self.local.client = self.app.test_client()
+        response = client.get(path, query_string=params, headers={"Accept-Encoding" : ACCEPT_ENCODING})
+        return response.status_code, response.get_data()
+
+
+class HTTPClient(object):
+    """Sends the requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def get(self, path, params):
+        request = Request(self.base_url + path + ("?" + urlencode(params, doseq=True) if params else ""),
+                          headers={"Accept-Encoding" : ACCEPT_ENCODING})
+        try:
+            with urlopen(request) as response:
+                return response.status, response.read()
+        except HTTPError as error:
+            return error.code, error.read()
+
+
+class RequestsFactory(object):
+    """Builds realistic parameters for each route, using dates, genres, authors and words
+    retrieved from the API itself before the test starts"""
+
+    def __init__(self, client, random):
+        self.random = random
+        date_brackets = self._fetch(client, "/api/date_brackets", {},
+                                    {"first_date" : "1800-01-01", "last_date" : "2015-12-31"})
+        self.first_year = int(date_brackets["first_date"][:4])
+        self.last_year = int(date_brackets["last_date"][:4])
+        self.genres = [genre["id"] for genre in self._fetch(client, "/api/genres", {}, [])]
+        authors = self._fetch(client, "/api/authors", {"name_query" : "e", "limit" : 500}, [])
+        self.authors = [author["name"] for author in authors] or ["hugo"]
+        self.authors_ids = [author["id"] for author in authors]
+        self.words = list(self._fetch(client, "/api/word-cloud", {}, {})) or ["amour"]
+
+    @staticmethod
+    def _fetch(client, path, params, default):
+        """Decoded json response of the route, or the default value if the request failed"""
+        status, body = client.get(path, params)
+        if status != 200:
+            return default
+        try:
+            if body[:2] == b"\x1f\x8b":
+                body = gzip.decompress(body)
+            return json.loads(body.decode("utf-8"))
+        except ValueError:
+            return default
+
+    def _filters(self):
+        """No filters half of the time, else a date bracket, and sometimes a genre or an author"""
+        params = {}
+        if self.random.random() < 0.5:
+            return params
+        start_year = self.random.randint(self.first_year, self.last_year)
+        params["start_date"] = str(date(start_year, 1, 1))
+        params["end_date"] = str(date(self.random.randint(start_year, self.last_year), 12, 31))
+        if self.genres and self.random.random() < 0.3:
+            params["genre"] = self.random.choice(self.genres)
+        if self.authors_ids and self.random.random() < 0.2:
+            params["author"] = self.random.choice(self.authors_ids)
+        return params
+
+    def _typed_prefix(self, values):
+        """What's typed in an autocomplete field: the start of an existing value"""
+        value = self.random.choice(values)
+        return value[:self.random.randint(1, len(value))]
+
+    def build(self, route):
+        if route == "date_brackets":
+            return "/api/date_brackets", {}
+        elif route == "genres":
+            return "/api/genres", {}
+        elif route == "authors":
+            return "/api/authors", {"name_query" : self._typed_prefix(self.authors)}
+        elif route in ("dashboard", "statistics", "word-cloud", "facets"):
+            return "/api/" + route, self._filters()
+        elif route == "words":
+            return "/api/words", {"query" : self._typed_prefix(self.words)}
+        elif route == "semantic-fields":
+            words = self.random.sample(self.words, min(len(self.words), self.random.randint(1, 3)))
+            return "/api/semantic-fields", dict(self._filters(), word=words, k=self.random.choice([5, 10]))
+        raise ValueError("Unknown route %s" % route)
+
+
+def parse_mix(mix_str):
+    if mix_str is None:
+        return DEFAULT_MIX
+    mix = {}
+    for entry in mix_str.split(","):
+        route, weight = entry.split("=")
+        if route not in DEFAULT_MIX:
+            raise ValueError("Unknown route %s, should be one of %s" % (route, ", ".join(DEFAULT_MIX)))
+        mix[route] = float(weight)
+    return mix
+
+
+def run(client, factory, mix, rate, duration, concurrency, random):
+    """Schedules the requests at a fixed rate, and returns the latencies and errors count of each route"""
+    routes, weights = zip(*mix.items())
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def send(route, path, params, scheduled_time):
+        try:
+            status, body = client.get(path, params)
+            failed = status >= 400
+        except Exception:
+            failed = True
+        latency = perf_counter() - scheduled_time
+        with lock:
+            latencies[route].append(latency)
+            if failed:
+                errors[route] += 1
+
+    # the requests are all built beforehand, so that building them doesn't delay their sending
+    scheduled = [(i / rate, route) + factory.build(route)
+                 for i, route in enumerate(random.choices(routes, weights, k=int(rate * duration)))]
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for offset, route, path, params in scheduled:
+            delay = start + offset - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            executor.submit(send, route, path, params, start + offset)
+    return latencies, errors, perf_counter() - start
+
+
+def report(latencies, errors, elapsed):
+    print("%-16s %8s %8s %10s %10s %10s %10s" % ("route", "requests", "errors", "req/s",
+                                                 "p50 (ms)", "p95 (ms)", "p99 (ms)"))
+    all_latencies = []
+    for route in sorted(latencies):
+        route_latencies = np.array(latencies[route]) * 1000
+        all_latencies.extend(route_latencies)
+        print("%-16s %8i %8i %10.1f %10.1f %10.1f %10.1f" % ((route, len(route_latencies), errors[route],
+                                                               len(route_latencies) / elapsed)
+                                                              + tuple(np.percentile(route_latencies, [50, 95, 99]))))
+    if all_latencies:
+        print("%-16s %8i %8i %10.1f %10.1f %10.1f %10.1f" % (("total", len(all_latencies), sum(errors.values()),
+                                                               len(all_latencies) / elapsed)
+                                                              + tuple(np.percentile(all_latencies, [50, 95, 99]))))
+
+
+def main():
+    args = argparser.parse_args()
+    random = Random(args.seed)
+    client = HTTPClient(args.url) if args.url else InProcessClient()
+    factory = RequestsFactory(client, random)
+    latencies, errors, elapsed = run(client, factory, parse_mix(args.mix), args.rate, args.duration,
+                                     args.concurrency, random)
+    report(latencies, errors, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measures the recall@5 and the latency of the approximate semantic field index against the exact
+cosine similarities, for several numbers of probed partitions. Run it from the repository's root with
+
+    python3 -m benchmarks.semantic_index         # on a synthetic vocabulary
+    python3 -m benchmarks.semantic_index --db    # on the whole books collection
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+from models.esa import ESAHelper, SemanticIndex, normalize_rows, DEFAULT_COMPONENTS
+
+K = 5
+QUERIES_COUNT = 200
+PROBES = [1, 2, 4, 8, 16, 32]
+
+argparser = ArgumentParser(description=__doc__)
+argparser.add_argument("--db", action="store_true", help="use the books collection instead of synthetic data")
+argparser.add_argument("--words", type=int, default=50000, help="synthetic vocabulary size")
+argparser.add_argument("--books", type=int, default=2000, help="synthetic books count")
+argparser.add_argument("--components", type=int, default=DEFAULT_COMPONENTS)
+
+
+def synthetic_tfidf_matrix(words_count, books_count, topics_count=50, seed=0):
+    """Each word mostly appears in the books of its topic, with a zipfian number of occurrences"""
+    random_state = np.random.RandomState(seed)
+    books_topics = random_state.randint(topics_count, size=books_count)
+    topics_books = [np.flatnonzero(books_topics == topic) for topic in range(topics_count)]
+    rows, columns = [], []
+    for word in range(words_count):
+        topic_books = topics_books[random_state.randint(topics_count)]
+        books_per_word = min(len(topic_books), random_state.zipf(1.5) + 1)
+        books = random_state.choice(topic_books, books_per_word, replace=False)
+        # a bit of noise outside of the topic
+        books = np.union1d(books, random_state.randint(books_count, size=random_state.poisson(1)))
+        rows.extend([word] * len(books))
+        columns.extend(books)
+    values = 1 + np.log(random_state.zipf(2, size=len(rows)))
+    return coo_matrix((values, (rows, columns)), shape=(words_count, books_count))
+
+
+def db_tfidf_matrix():
+    from models.mongo import DBConnector
+    db_connector = DBConnector()
+    books_ids_list = [book["_id"] for book in db_connector.books.find({}, {"_id" : 1})]
+    tfidf_matrix, vocab_dict, vocab_list = db_connector._build_tfidf_matrix(books_ids_list)
+    return tfidf_matrix
+
+
+def main():
+    args = argparser.parse_args()
+    tfidf_matrix = normalize_rows(db_tfidf_matrix() if args.db
+                                  else synthetic_tfidf_matrix(args.words, args.books))
+    words_count = tfidf_matrix.shape[0]
+    queries = np.random.RandomState(1).choice(words_count, min(QUERIES_COUNT, words_count), replace=False)
+
+    start = perf_counter()
+    semantic_index = SemanticIndex(tfidf_matrix, list(range(words_count)), n_components=args.components)
+    print("%i words x %i books, index built in %.1fs (%i partitions)"
+          % (tfidf_matrix.shape + (perf_counter() - start, len(semantic_index.centroids))))
+
+    start = perf_counter()
+    exact_results = [set(ESAHelper.closest_words(tfidf_matrix, [query], K)[0][0].tolist()) for query in queries]
+    print("%-10s %12s %10s" % ("probes", "query (ms)", "recall@%i" % K))
+    print("%-10s %12.2f %10.3f" % ("exact", (perf_counter() - start) * 1000 / len(queries), 1))
+
+    for n_probe in PROBES:
+        start = perf_counter()
+        approximate_results = [semantic_index.closest_words(query, K, n_probe)[0] for query in queries]
+        elapsed = perf_counter() - start
+        recall = np.mean([len(exact & set(approximate.tolist())) / len(exact)
+                          for exact, approximate in zip(exact_results, approximate_results) if exact])
+        print("%-10i %12.2f %10.3f" % (n_probe, elapsed * 1000 / len(queries), recall))
+
+
+if __name__ == '__main__':
+    main()
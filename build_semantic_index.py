@@ -0,0 +1,21 @@
+"""Builds the approximate semantic field index over the whole books collection.
+It has to be rebuilt when books are added, for the semantic field queries made with approximate=true."""
+from argparse import ArgumentParser
+from time import time
+
+from models.mongo import DBConnector
+from models.esa import DEFAULT_COMPONENTS, SEMANTIC_INDEX_PATH
+
+argparser = ArgumentParser(description=__doc__)
+argparser.add_argument("--components", type=int, default=DEFAULT_COMPONENTS,
+                       help="dimension of the projected word vectors")
+argparser.add_argument("--lists", type=int, default=None,
+                       help="number of partitions of the vocabulary (defaults to sqrt(vocabulary size))")
+
+
+if __name__ == '__main__':
+    args = argparser.parse_args()
+    start = time()
+    semantic_index = DBConnector().build_semantic_index(n_components=args.components, n_lists=args.lists)
+    print("Indexed %i words in %.1fs, saved to %s" % (len(semantic_index.vocab_list), time() - start,
+                                                      SEMANTIC_INDEX_PATH))
@@ -1,3 +1,4 @@
 from .filters import RetrieveAuthorsHandler, RetrieveDateBracketsHandler, RetrieveGenresHandler
-from .collections import RetrieveDashboardHandler, RetrieveStatisticsHandler, RetrieveWordcloudHandler
+from .collections import RetrieveDashboardHandler, RetrieveStatisticsHandler, RetrieveWordcloudHandler, \
+    RetrieveFacetsHandler
 from .semantic import RetrieveWordSemanticField, RetrieveMatchingWordsList
\ No newline at end of file
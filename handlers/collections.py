@@ -1,5 +1,6 @@
 from .filters import BaseDateFilteredHandler
-from models.stubs import ADVANCED_STATS_STUB, ADVANCED_STATS_EMPTY_RESPONSE, DASHBOARD_STATS_EMPTY_RESPONSE
+from models.stubs import ADVANCED_STATS_STUB, ADVANCED_STATS_EMPTY_RESPONSE, DASHBOARD_STATS_EMPTY_RESPONSE, \
+    FACETS_EMPTY_RESPONSE
 from models.filtering import NoBookFound
 from .filters import failsafe
 
@@ -39,4 +40,14 @@ class RetrieveWordcloudHandler(BaseMetadataFilterHandler):
         try:
             return self.db_connector.retrieve_word_cloud(**args)
         except NoBookFound:
-            return []
\ No newline at end of file
+            return []
+
+class RetrieveFacetsHandler(BaseMetadataFilterHandler):
+    """Returns the number of books of each author and genre for a given collection"""
+    @failsafe
+    def get(self):
+        args = self.reqparse.parse_args()
+        try:
+            return self.db_connector.compute_facets(**args)
+        except NoBookFound:
+            return FACETS_EMPTY_RESPONSE
\ No newline at end of file
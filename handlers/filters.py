@@ -2,6 +2,7 @@ from time import sleep
 from flask_restful import Resource, reqparse
 from pymongo.errors import AutoReconnect
 from models.mongo import DBConnector
+from models.search import DEFAULT_SEARCH_LIMIT
 
 def failsafe(func):
     def wrapper(*args, **kwargs):
@@ -38,8 +39,9 @@ class RetrieveAuthorsHandler(BaseDateFilteredHandler):
     @failsafe
     def get(self):
         self.reqparse.add_argument("name_query", type=str, required=True)
+        self.reqparse.add_argument("limit", type=int, default=DEFAULT_SEARCH_LIMIT)
         args = self.reqparse.parse_args()
-        return self.db_connector.filtering_helper.get_authors_list(args["name_query"])
+        return self.db_connector.filtering_helper.get_authors_list(args["name_query"], args["limit"])
 
 class RetrieveGenresHandler(BaseDateFilteredHandler):
     """Returns the list of all authors available """
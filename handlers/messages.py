@@ -34,6 +34,19 @@ dashboard_data = {
 }
 
 
+### For the facets
+
+facet = {
+    'id': fields.Integer, # ID set by the DB connector
+    'name': fields.String, # actual name
+    'count': fields.Integer, # number of books in the collection for this author/genre
+}
+
+facets_data = {
+    'authors' : fields.List(fields.Nested(facet)),
+    'genres' : fields.List(fields.Nested(facet)),
+}
+
 # a single word
 word_stat = {
     "id" : fields.String,
@@ -0,0 +1,91 @@
+import gzip
+import json
+from datetime import date, datetime
+
+import numpy as np
+from bson.objectid import ObjectId
+from flask import make_response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+""" This module defines the json representation used by the API: a faster serializer
+(orjson if it's installed) that knows about our mongo/numpy types, and a transparent
+gzip/brotli compression of the big payloads, negotiated using the Accept-Encoding header
+"""
+
+COMPRESSION_THRESHOLD = 1024 # in bytes, smaller payloads are sent as is
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(obj):
+    """Casts the types that aren't json-serializable by default"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+
+def std_dumps(data):
+    """Serializer based on the standard library's json module"""
+    return json.dumps(data, default=_default, ensure_ascii=False).encode("utf-8")
+
+
+def fast_dumps(data):
+    """Serializer based on orjson, falls back to the standard json module if it's not installed"""
+    if orjson is None:
+        return std_dumps(data)
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _compressors():
+    compressors = {"gzip" : lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL)}
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    return compressors
+
+COMPRESSORS = _compressors()
+
+
+def compress(body, accept_encodings):
+    """Compresses the body using the best encoding accepted by the client.
+    Returns the (possibly) compressed body and the chosen encoding, or None"""
+    # brotli is tried first, since it's both faster and smaller than gzip at these settings
+    encoding = accept_encodings.best_match([encoding for encoding in ("br", "gzip") if encoding in COMPRESSORS])
+    if encoding is None:
+        return body, None
+    return COMPRESSORS[encoding](body), encoding
+
+
+def json_representation(dumps=fast_dumps, compression_threshold=COMPRESSION_THRESHOLD):
+    """Builds a flask-restful representation function, to be registered for 'application/json'.
+    Set compression_threshold to None to disable the compression"""
+
+    def output_json(data, code, headers=None):
+        body = dumps(data)
+        encoding = None
+        if compression_threshold is not None and len(body) >= compression_threshold:
+            body, encoding = compress(body, request.accept_encodings)
+
+        response = make_response(body, code)
+        response.headers.extend(headers or {})
+        response.headers["Content-Type"] = "application/json"
+        response.vary.add("Accept-Encoding")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+    return output_json
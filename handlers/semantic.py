@@ -1,7 +1,14 @@
+from flask_restful import abort, inputs
+
 from .collections import BaseMetadataFilterHandler
 from models.mongo import WordNotFound
+from models.esa import SEMANTIC_FIELD_SIZE, DEFAULT_PROBES
 from .filters import failsafe
 
+MAX_SEMANTIC_FIELD_SIZE = 100
+MAX_QUERY_WORDS = 400
+MAX_PROBES = 256 # number of partitions searched by approximate queries
+
 class RetrieveMatchingWordsList(BaseMetadataFilterHandler):
     """Retrieves a list of words matching the given query"""
 
@@ -21,14 +28,20 @@ class RetrieveMatchingWordsList(BaseMetadataFilterHandler):
 
 
 class RetrieveWordSemanticField(BaseMetadataFilterHandler):
-    """Retrieves the semantic field of 5 words for a given query"""
+    """Retrieves the semantic field of k words (with their relation scores) for each of the query words"""
 
     @failsafe
     def get(self):
-        self.reqparse.add_argument("word", type=str, required=True)
+        self.reqparse.add_argument("word", type=str, required=True, action="append")
+        self.reqparse.add_argument("k", type=inputs.int_range(1, MAX_SEMANTIC_FIELD_SIZE), default=SEMANTIC_FIELD_SIZE)
+        self.reqparse.add_argument("approximate", type=inputs.boolean, default=False)
+        self.reqparse.add_argument("probes", type=inputs.int_range(1, MAX_PROBES), default=DEFAULT_PROBES)
         args = self.reqparse.parse_args()
+        if len(args["word"]) > MAX_QUERY_WORDS:
+            abort(400, message="At most %i words can be queried at once" % MAX_QUERY_WORDS)
 
-        if self.db_connector.check_if_word_exists(args["word"]):
+        args["word"] = self.db_connector.get_existing_words(args["word"])
+        if args["word"]:
             try:
                 return self.db_connector.retrieve_semantic_field(**args)
             except WordNotFound:
@@ -2,9 +2,11 @@ from flask import Flask
 from flask_restful import Api
 
 from handlers import *
+from handlers.representations import json_representation
 
 app = Flask(__name__)
 api = Api(app)
+api.representations['application/json'] = json_representation()
 
 ### This is the api's routing table
 
@@ -17,6 +19,7 @@ api.add_resource(RetrieveAuthorsHandler, '/api/authors')
 api.add_resource(RetrieveDashboardHandler, '/api/dashboard')
 api.add_resource(RetrieveStatisticsHandler, '/api/statistics')
 api.add_resource(RetrieveWordcloudHandler, '/api/word-cloud')
+api.add_resource(RetrieveFacetsHandler, '/api/facets')
 
 #semantic analysis
 api.add_resource(RetrieveMatchingWordsList, '/api/words')
@@ -1,3 +1,3 @@
 from .mongo import DBConnector
-from .stubs import ADVANCED_STATS_EMPTY_RESPONSE, DASHBOARD_STATS_EMPTY_RESPONSE
+from .stubs import ADVANCED_STATS_EMPTY_RESPONSE, DASHBOARD_STATS_EMPTY_RESPONSE, FACETS_EMPTY_RESPONSE
 from .caching import memoized
\ No newline at end of file
@@ -1,4 +1,5 @@
 from os import makedirs
+from time import time
 
 __author__ = 'hadware'
 from os.path import dirname, join, isdir
@@ -32,6 +33,26 @@ class cached(object):
 
         return decorator
 
+class local_cached(object):
+    """Same as cached, but the value is kept in the process' memory, for objects that are too big
+    to be unpickled from the filesystem cache on each request"""
+
+    local_cache = {}
+
+    def __init__(self, cache_key, timeout=None):
+        self.timeout = timeout or CACHE_TIMEOUT
+        self.cache_key = cache_key
+
+    def __call__(self, f):
+        def decorator(*args, **kwargs):
+            expiry, cached_value = self.local_cache.get(self.cache_key, (0, None))
+            if cached_value is None or expiry < time():
+                cached_value = f(*args, **kwargs)
+                self.local_cache[self.cache_key] = (time() + self.timeout, cached_value)
+            return cached_value
+
+        return decorator
+
 kwd_mark = object
 
 class memoized(object):
@@ -1,5 +1,141 @@
+import pickle
+from math import sqrt
+from os import replace
+from os.path import dirname, getmtime, join
+
+import numpy as np
+import numpy.linalg as LA
+from scipy.sparse import csr_matrix, diags
+from scipy.sparse.linalg import svds
+
 __author__ = 'hadware'
 
+SEMANTIC_INDEX_PATH = join(dirname(__file__), "semantic_index.pkl")
+DEFAULT_COMPONENTS = 100 # dimension of the projected word vectors
+SEMANTIC_FIELD_SIZE = 5 # default number of words in a semantic field
+DEFAULT_PROBES = 8 # number of partitions searched for each query: more is slower, but with a better recall
+ASSIGNMENT_BATCH_SIZE = 10000
+SCORING_BATCH_SIZE = 16 # query words scored together, bounds the size of the dense scores array
+
+
+def normalize_rows(matrix):
+    """L2-normalizes the rows of a sparse matrix, so that the dot products of its rows are cosine similarities"""
+    matrix = csr_matrix(matrix)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return csr_matrix(diags(1 / norms) @ matrix)
+
+
+def top_k(scores, k):
+    """Indices of the k biggest scores, biggest first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def _neighbours(words_indices, scores, word_index, k):
+    """The k best scored words, leaving out the query word itself and the unrelated words"""
+    best = np.array([i for i in top_k(scores, k + 1) if words_indices[i] != word_index and scores[i] > 0][:k],
+                    dtype=np.int64)
+    return words_indices[best], scores[best]
+
 
 class ESAHelper(object):
-    pass
+    """Takes care of the explicit semantic analysis computations, on row-normalized tfidf matrices
+    (one row per word, one column per book)"""
+
+    @staticmethod
+    def closest_words(tfidf_matrix, words_indices, k):
+        """Exact cosine similarity between each of the query words and every word of the vocabulary,
+        computed as sparse products over batches of query words. Returns, for each query word,
+        the indices of its k closest words and their scores"""
+        vocab_indices = np.arange(tfidf_matrix.shape[0])
+        closest_words = []
+        for i in range(0, len(words_indices), SCORING_BATCH_SIZE):
+            batch_indices = words_indices[i:i + SCORING_BATCH_SIZE]
+            scores = (tfidf_matrix[batch_indices] @ tfidf_matrix.T).toarray()
+            closest_words.extend(_neighbours(vocab_indices, word_scores, word_index, k)
+                                 for word_index, word_scores in zip(batch_indices, scores))
+        return closest_words
+
+
+def _assign(vectors, centroids):
+    """Index of the closest centroid for each vector, computed by batches to bound the memory use"""
+    return np.concatenate([np.argmax(vectors[i:i + ASSIGNMENT_BATCH_SIZE] @ centroids.T, axis=1)
+                           for i in range(0, len(vectors), ASSIGNMENT_BATCH_SIZE)])
+
+
+def _spherical_kmeans(vectors, n_lists, n_iter, random_state):
+    centroids = vectors[random_state.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        norms = LA.norm(sums, axis=1)
+        # empty partitions keep their previous centroid
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids, _assign(vectors, centroids)
+
+
+class SemanticIndex(object):
+    """Approximate nearest neighbours index over the tfidf word vectors.
+
+    The word vectors are projected to a low dimension using a truncated SVD, then partitioned
+    in about sqrt(vocabulary size) clusters (IVF). A query only looks at the words of the
+    n_probe clusters closest to it, and ranks them using their exact tfidf cosine similarity"""
+
+    def __init__(self, tfidf_matrix, vocab_list, n_components=DEFAULT_COMPONENTS, n_lists=None,
+                 n_iter=10, seed=0):
+        self.vocab_list = vocab_list
+        self.vocab_dict = {word : i for i, word in enumerate(vocab_list)}
+        self.tfidf_matrix = normalize_rows(tfidf_matrix)
+
+        if min(self.tfidf_matrix.shape) < 2:
+            raise ValueError("At least two words and two books are needed to build the index")
+        random_state = np.random.RandomState(seed)
+        n_components = min(n_components, min(self.tfidf_matrix.shape) - 1)
+        u, s, vt = svds(self.tfidf_matrix, k=n_components, v0=random_state.rand(min(self.tfidf_matrix.shape)))
+        vectors = (u * s).astype(np.float32)
+        norms = LA.norm(vectors, axis=1)
+        norms[norms == 0] = 1
+        self.vectors = vectors / norms[:, None]
+
+        n_lists = min(n_lists or int(sqrt(len(vocab_list))), len(vocab_list))
+        self.centroids, assignments = _spherical_kmeans(self.vectors, max(1, n_lists), n_iter, random_state)
+        # the words of each partition are contiguous in lists_members
+        self.lists_members = np.argsort(assignments, kind="stable")
+        self.lists_offsets = np.searchsorted(assignments[self.lists_members], np.arange(len(self.centroids) + 1))
+
+    def closest_words(self, word_index, k, n_probe=DEFAULT_PROBES):
+        """Approximate version of ESAHelper.closest_words, for a single query word"""
+        probes = top_k(self.centroids @ self.vectors[word_index], n_probe)
+        candidates = np.concatenate([self.lists_members[self.lists_offsets[probe]:self.lists_offsets[probe + 1]]
+                                     for probe in probes])
+        scores = (self.tfidf_matrix[candidates] @ self.tfidf_matrix[word_index].T).toarray().ravel()
+        return _neighbours(candidates, scores, word_index, k)
+
+    def save(self, path=SEMANTIC_INDEX_PATH):
+        # written to a temporary file first, so that a running server never loads a partially written index
+        with open(path + ".tmp", "wb") as index_file:
+            pickle.dump(self, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(path + ".tmp", path)
+
+    _loaded = {}
+
+    @staticmethod
+    def load(path=SEMANTIC_INDEX_PATH):
+        """Loads the index saved at the given path, or returns None if there is none.
+        The loaded index is kept in memory, and reloaded when the file is rebuilt"""
+        try:
+            mtime = getmtime(path)
+        except OSError:
+            return None
+        loaded_mtime, semantic_index = SemanticIndex._loaded.get(path, (None, None))
+        if loaded_mtime != mtime:
+            with open(path, "rb") as index_file:
+                semantic_index = pickle.load(index_file)
+            SemanticIndex._loaded[path] = (mtime, semantic_index)
+        return semantic_index
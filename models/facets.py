@@ -0,0 +1,64 @@
+import numpy as np
+
+__author__ = 'hadware'
+
+AUTHORS_FACET = "authors"
+GENRES_FACET = "genres"
+
+
+class BookMetadataTable(object):
+    """Columnar view of the book -> author and book -> genre relations.
+
+    Each relation is stored as two parallel int arrays (book row, metadata code), so that
+    any count over a set of selected books is just a masked bincount/unique, instead of
+    a mongo aggregation unwinding every idRef array"""
+
+    def __init__(self, books_ids, authors, genres, authors_refs, genres_refs):
+        """books_ids is the ordered list of books ObjectId's (giving each book its row),
+        authors and genres are dicts of the form { code : name }, and authors_refs and
+        genres_refs are dicts of the form { code : [books ObjectId's] }.
+        The names are kept along the codes, so that both always come from the same snapshot"""
+        self.books_index = {book_id : i for i, book_id in enumerate(books_ids)}
+        self.books_count = len(books_ids)
+        self.names = {AUTHORS_FACET : dict(authors),
+                      GENRES_FACET : dict(genres)}
+        self.columns = {AUTHORS_FACET : self._build_columns(authors_refs),
+                        GENRES_FACET : self._build_columns(genres_refs)}
+        self.codes_count = {facet : max(names, default=-1) + 1 for facet, names in self.names.items()}
+
+    def _build_columns(self, refs):
+        """Flattens a { code : [ObjectId's] } dict to a (rows, codes) couple of arrays,
+        dropping unknown books and duplicate (book, code) pairs"""
+        rows, codes = [], []
+        for code, books_ids in refs.items():
+            for book_id in books_ids:
+                if book_id in self.books_index:
+                    rows.append(self.books_index[book_id])
+                    codes.append(code)
+
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        pairs = np.unique(np.array([rows, codes], dtype=np.int64), axis=1)
+        return pairs[0], pairs[1]
+
+    def selection_mask(self, books_ids=None):
+        """Boolean mask over the books rows. A None book set selects every book"""
+        if books_ids is None:
+            return np.ones(self.books_count, dtype=bool)
+
+        mask = np.zeros(self.books_count, dtype=bool)
+        mask[[self.books_index[book_id] for book_id in books_ids if book_id in self.books_index]] = True
+        return mask
+
+    def _selected_codes(self, facet, mask):
+        rows, codes = self.columns[facet]
+        return codes[mask[rows]]
+
+    def unique_count(self, facet, mask):
+        """Number of distinct authors or genres having at least one book in the selection"""
+        return int(np.unique(self._selected_codes(facet, mask)).size)
+
+    def facet_counts(self, facet, mask):
+        """Array of the number of selected books for each author or genre code"""
+        return np.bincount(self._selected_codes(facet, mask), minlength=self.codes_count[facet])
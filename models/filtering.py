@@ -1,9 +1,13 @@
 from datetime import date
-import re
+
+import numpy as np
+from pymongo import ASCENDING
 
 from .config_db import AUTHORS_COLLECTION_NAME, BOOKS_COLLECTION_NAME, TOPICS_COLLECTION_NAME, GLOSSARIES_COLLECTION_NAME
 from operator import itemgetter
-from .caching import cached
+from .caching import cached, local_cached
+from .facets import BookMetadataTable, AUTHORS_FACET, GENRES_FACET
+from .search import NameIndex, DEFAULT_SEARCH_LIMIT
 
 
 class Pipeline(object):
@@ -54,7 +58,7 @@ class FilteringHelper(object):
     def _retrieve_authors(self):
         return { i:  entry["_id"]
                 for i, entry
-                in enumerate(self.authors.find())}
+                in enumerate(self.authors.find().sort("_id", ASCENDING))}
 
     @property
     def cached_authors(self):
@@ -64,15 +68,21 @@ class FilteringHelper(object):
             self._authors = self._retrieve_authors()
             return self._authors
 
-    def get_authors_list(self, query_str):
-        return [ {"id" : author_id, "name" : name} for author_id, name in self.cached_authors.items()
-                if re.search(query_str, name, re.IGNORECASE)]
+    @local_cached("authors_index")
+    def _build_authors_index(self):
+        print("Building authors index")
+        return NameIndex(self.cached_authors)
+
+    def get_authors_list(self, query_str, limit=DEFAULT_SEARCH_LIMIT):
+        """Returns the authors matching the query, ignoring accents and case, best matches first"""
+        return [ {"id" : author_id, "name" : name}
+                 for author_id, name in self._build_authors_index().search(query_str, limit)]
 
     @cached("genres_list")
     def _retrieve_genres(self):
         return { i:  entry["_id"]
                 for i, entry
-                in enumerate(self.genres.find())}
+                in enumerate(self.genres.find().sort("_id", ASCENDING))}
 
     @property
     def cached_genres(self):
@@ -86,6 +96,29 @@ class FilteringHelper(object):
         return [ {"id" : genre_id, "name" : name} for genre_id, name in self.cached_genres.items()]
 
 
+    def _retrieve_metadata_refs(self, collection, cached_codes):
+        """Maps each cached author or genre code to the ObjectId's of its books"""
+        codes_dict = {name : code for code, name in cached_codes.items()}
+        return { codes_dict[entry["_id"]] : entry.get("idRef", [])
+                 for entry in collection.find({}, {"idRef" : 1})
+                 if entry["_id"] in codes_dict}
+
+    @local_cached("books_metadata_table")
+    def _retrieve_metadata_table(self):
+        print("Building books metadata table")
+        authors, genres = self.cached_authors, self.cached_genres
+        return BookMetadataTable([entry["id"] for entry in self._retrieve_books_dates()], authors, genres,
+                                 self._retrieve_metadata_refs(self.authors, authors),
+                                 self._retrieve_metadata_refs(self.genres, genres))
+
+    @property
+    def metadata_table(self):
+        try :
+            return self._metadata_table
+        except AttributeError:
+            self._metadata_table = self._retrieve_metadata_table()
+            return self._metadata_table
+
     def compute_book_filter(self, **kwargs):
 
         args_dict = {}
@@ -172,15 +205,21 @@ class FilteringHelper(object):
             return ouput_booksid_list, max_date, min_date
 
 
-    def get_unique_count(self,collection, books_ids):
-        """Functioned used to count the number of unique authors or genre for a given set of bookids"""
-        metadata_count_pipeline = [
-            {"$unwind" : "$idRef"},
-            {"$match" : { "idRef" : { "$in" : books_ids}}},
-            {"$group" : { "_id" : "$_id"}},
-            {"$group" : { "_id" : 1, "count" : {"$sum" : 1}}}
-        ]
-
-        return next(collection.aggregate(metadata_count_pipeline))["count"]
-
-
+    def get_unique_count(self, facet, books_ids):
+        """Functioned used to count the number of unique authors or genre for a given set of bookids.
+        facet is either "authors" or "genres" """
+        table = self.metadata_table
+        return table.unique_count(facet, table.selection_mask(books_ids))
+
+    def get_facets(self, books_ids=None):
+        """Per-author and per-genre books counts for a given set of bookids (all books if None),
+        both computed from the same selection mask. Only non-empty facets are returned, biggest first"""
+        table = self.metadata_table
+        mask = table.selection_mask(books_ids)
+        facets = {}
+        for facet in (AUTHORS_FACET, GENRES_FACET):
+            counts = table.facet_counts(facet, mask)
+            nonzero_codes = np.flatnonzero(counts)
+            facets[facet] = [{"id" : int(code), "name" : table.names[facet][int(code)], "count" : int(counts[code])}
+                             for code in nonzero_codes[np.argsort(-counts[nonzero_codes], kind="stable")]]
+        return facets
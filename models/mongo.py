@@ -1,17 +1,16 @@
 from math import floor, log
 
-from scipy.spatial.distance import cosine
 from pymongo import MongoClient
 from bson.objectid import ObjectId
-import numpy as np
 from scipy.sparse import coo_matrix
-import numpy.linalg as LA
 
 from .caching import cached
 from .filtering import Pipeline, FilteringHelper
 from .config_db import AUTHORS_COLLECTION_NAME, BOOKS_COLLECTION_NAME, TOPICS_COLLECTION_NAME, \
     GLOSSARIES_COLLECTION_NAME, BOOKSTATS_COLLECTION_NAME, DB_ADDRESS
-from .esa import ESAHelper
+from .esa import ESAHelper, SemanticIndex, normalize_rows, SEMANTIC_FIELD_SIZE, \
+    DEFAULT_PROBES
+from .facets import AUTHORS_FACET, GENRES_FACET
 
 
 class WordNotFound(Exception):
@@ -32,7 +31,7 @@ class DBConnector(object):
 
         # declaring helpers
         self.filtering_helper = FilteringHelper(self.epub_db)
-        self.esa_helper = ESAHelper
+        self.esa_helper = ESAHelper()
 
 
     def compute_dashboard_stats(self, **kwargs):
@@ -52,9 +51,9 @@ class DBConnector(object):
             # first, we update the response according to the filter's parameters
             filtered_books_ids, max_date, min_date = self.filtering_helper.get_filtered_book_set(args_dict)
             response.update({
-                "nb_authors" : self.filtering_helper.get_unique_count(self.authors, filtered_books_ids)
+                "nb_authors" : self.filtering_helper.get_unique_count(AUTHORS_FACET, filtered_books_ids)
                                 if args_dict["author_id"] is None else 1,
-                "nb_genres" : self.filtering_helper.get_unique_count(self.genres, filtered_books_ids)
+                "nb_genres" : self.filtering_helper.get_unique_count(GENRES_FACET, filtered_books_ids)
                                 if args_dict["genre_id"] is None else 1,
                 "date_first_book" : str(min_date),
                 "date_last_book" : str(max_date)
@@ -84,6 +83,15 @@ class DBConnector(object):
             response["nb_words"] = str(floor(word_query_result["words_total"] / 1000)) + "K"
         return response
 
+    def compute_facets(self, **kwargs):
+        """Retrieves the books count of each author and genre for a given book set"""
+
+        # first, we send the kwargs to this method, which figures out the filters to use
+        args_dict = self.filtering_helper.compute_book_filter(**kwargs)
+        filtered_books_ids, max_date, min_date = self.filtering_helper.get_filtered_book_set(args_dict)
+
+        return self.filtering_helper.get_facets(filtered_books_ids)
+
     def compute_advanced_stats(self, **kwargs):
         """Retrieving the data dfor the 'statistics' tab"""
         response = {"words" : {}, "sentences" : {}}
@@ -147,9 +155,10 @@ class DBConnector(object):
         del idf_table["_id"]
         return [word for word in idf_table]
 
-    def check_if_word_exists(self, word_query):
-        """Checks if a word actually is in the books"""
-        return word_query in self._get_full_glossary()
+    def get_existing_words(self, words):
+        """Filters out the words that aren't in the books, and the duplicates"""
+        full_glossary = set(self._get_full_glossary())
+        return [word for word in dict.fromkeys(words) if word in full_glossary]
 
     def get_matching_words(self, word_query):
         """Returns the words that contain the word query word"""
@@ -188,17 +197,9 @@ class DBConnector(object):
             idf_table[k] = [ ObjectId(object_id) for object_id in idf_table[k] if ObjectId(object_id) in books_dict]
         return idf_table
 
-    def retrieve_semantic_field(self, **kwargs):
-        """Retrieving the 5 words in the semantic field of a given word"""
-
-        # first, we send the kwargs to this method, which figures out the filters to use
-        args_dict = self.filtering_helper.compute_book_filter(**kwargs)
-
-        #then we build the book set (using they objectid's)
-        if args_dict is None:
-            books_ids_list = [book["_id"] for book in self.books.find({}, {"_id" : 1})]
-        else:
-            books_ids_list, max_date, min_date = self.filtering_helper.get_filtered_book_set(args_dict)
+    def _build_tfidf_matrix(self, books_ids_list):
+        """Builds the (sparse, row-normalized) tfidf matrix of a set of books, with one row per word
+        of the set's vocabulary. Returns the matrix, and the vocab dict and list"""
         books_count = len(books_ids_list)
         print("%i books used for analysis" % books_count)
         books_id_dict = { bookid : i for i, bookid in enumerate(books_ids_list)}
@@ -206,10 +207,6 @@ class DBConnector(object):
         # then we gather the vocab for the given book
         vocab_dict, vocab_list = self._get_set_vocab(books_ids_list)
 
-        # checking if the vocabulary isn't empty
-        if kwargs["word"] not in vocab_dict:
-            raise WordNotFound()
-
         # then, retrieving the glossaries for all concerned books
         glossaries_dict = self._get_glossary_dict(books_ids_list)
 
@@ -228,32 +225,60 @@ class DBConnector(object):
                     tfidf.append((1 + log(glossaries_dict[book_id][word])) * (books_count / len(idf_table[word])))
 
         tfidf_matrix = coo_matrix((tfidf, (row, column)), shape=(len(vocab_dict), books_count))
-        tfidf_matrix = tfidf_matrix.todense()
-
         print("Done computing tfidf table")
+        return normalize_rows(tfidf_matrix), vocab_dict, vocab_list
 
-        query_word_row = tfidf_matrix[vocab_dict[kwargs["word"]]]
-        query_word_norm = LA.norm(query_word_row)
-        ESA_results = []
-        for word in vocab_dict:
-            # basically, computing the scalar product, divingin it by the product of norms, and then
-            # simply extracting item 0
-
-            # ESA_results.append((np.dot(query_word_row,
-            #                            tfidf_matrix.getrow(vocab_dict[word]).todense().T)
-            #                    /
-            #                     (
-            #                         LA.norm(tfidf_matrix.getrow(vocab_dict[word]).todense())
-            #                         *
-            #                         query_word_norm
-            #                     )).item(0)
-            #                    )
-            ESA_results.append(cosine(query_word_row, tfidf_matrix[vocab_dict[word]]))
+    def build_semantic_index(self, **index_kwargs):
+        """Builds the approximate semantic field index over the whole books collection, and saves it"""
+        books_ids_list = [book["_id"] for book in self.books.find({}, {"_id" : 1})]
+        tfidf_matrix, vocab_dict, vocab_list = self._build_tfidf_matrix(books_ids_list)
+        semantic_index = SemanticIndex(tfidf_matrix, vocab_list, **index_kwargs)
+        semantic_index.save()
+        return semantic_index
 
+    def _get_semantic_index(self):
+        """Loads the semantic field index built offline, None if it hasn't been built"""
+        return SemanticIndex.load()
+
+    @staticmethod
+    def _format_semantic_field(vocab_list, closest_words, scores):
+        return {"words" : [{"value" : vocab_list[i], "relation_score" : float(score)}
+                           for i, score in zip(closest_words, scores)]}
+
+    def retrieve_semantic_field(self, **kwargs):
+        """Retrieving the k words in the semantic field of each of the given words"""
+        query_words, k = kwargs["word"], kwargs.get("k") or SEMANTIC_FIELD_SIZE
+        n_probe = kwargs.get("probes") or DEFAULT_PROBES
+
+        # first, we send the kwargs to this method, which figures out the filters to use
+        args_dict = self.filtering_helper.compute_book_filter(**kwargs)
+
+        # the approximate index is built over the whole collection, so it can only answer unfiltered queries
+        if kwargs.get("approximate") and args_dict is None:
+            semantic_index = self._get_semantic_index()
+            if semantic_index is not None and all(word in semantic_index.vocab_dict for word in query_words):
+                return {word : self._format_semantic_field(semantic_index.vocab_list,
+                                                           *semantic_index.closest_words(
+                                                               semantic_index.vocab_dict[word], k, n_probe))
+                        for word in query_words}
+
+        #then we build the book set (using they objectid's)
+        if args_dict is None:
+            books_ids_list = [book["_id"] for book in self.books.find({}, {"_id" : 1})]
+        else:
+            books_ids_list, max_date, min_date = self.filtering_helper.get_filtered_book_set(args_dict)
+
+        tfidf_matrix, vocab_dict, vocab_list = self._build_tfidf_matrix(books_ids_list)
+
+        # the words that aren't in the filtered books are left out
+        query_words = [word for word in query_words if word in vocab_dict]
+        if not query_words:
+            raise WordNotFound()
+
+        # the rows being normalized, the cosine similarities of the query words with all the words
+        # are sparse products, computed over batches of query words
+        semantic_fields = self.esa_helper.closest_words(tfidf_matrix, [vocab_dict[word] for word in query_words], k)
         print("Finished computing the scalar products")
-        # casting the results to array, then, finding the 10 biggest coefficients
-        ESA_results_array = np.array(ESA_results)
-        closest_elements_indices = ESA_results_array.argsort()[:5]
-        print("Finished sorting results")
-        
-        return [vocab_list[i] for i in closest_elements_indices]
\ No newline at end of file
+
+        return {word : self._format_semantic_field(vocab_list, closest_words, scores)
+                for word, (closest_words, scores) in zip(query_words, semantic_fields)}
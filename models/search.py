@@ -0,0 +1,122 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+__author__ = 'hadware'
+
+DEFAULT_SEARCH_LIMIT = 50
+TRIGRAM_MIN_SIMILARITY = 0.3
+TRIGRAM_MAX_POSTINGS = 10000 # trigrams found in more names than this are too common to be used for lookups
+PREFIX_MASK_RATIO = 0.05 # prefixes matching more names than this ratio are deduplicated using a mask over all names
+
+_LIGATURES = str.maketrans({"œ" : "oe", "æ" : "ae"})
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(text):
+    """Lowercases the text and strips its accents, so that 'Émile' and 'emile' are the same"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().translate(_LIGATURES)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+def trigrams(tokens):
+    """Set of the trigrams of each token, padded so that the words starts weigh more"""
+    output = set()
+    for token in tokens:
+        padded = "  " + token + " "
+        output.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return output
+
+
+class NameIndex(object):
+    """Accent and case insensitive index over a { id : name } dict.
+
+    Names are matched on their tokens' prefixes (using a sorted token list), and if that doesn't
+    yield enough results, on their trigrams, which tolerates typos and partial words.
+    No user supplied pattern is ever compiled or run.
+
+    Internally, names are referred to by their rank, shortest names first, so that any sorted
+    array of ranks is also sorted by relevance"""
+
+    def __init__(self, names_dict):
+        ranked_items = sorted(((" ".join(tokenize(name)), name_id, name) for name_id, name in names_dict.items()),
+                              key=lambda item: (len(item[0]), item[0], item[1]))
+        self.ranked_ids = [name_id for folded_name, name_id, name in ranked_items]
+        self.ranked_names = [name for folded_name, name_id, name in ranked_items]
+        self.ranked_tokens = [folded_name.split(" ") for folded_name, name_id, name in ranked_items]
+
+        tokens_entries = sorted((token, rank) for rank, tokens in enumerate(self.ranked_tokens)
+                                for token in set(tokens) if token)
+        self.tokens = [token for token, rank in tokens_entries]
+        self.tokens_ranks = np.array([rank for token, rank in tokens_entries], dtype=np.int64)
+
+        postings = {}
+        for rank, tokens in enumerate(self.ranked_tokens):
+            for trigram in trigrams(tokens):
+                postings.setdefault(trigram, []).append(rank)
+        self.trigrams_postings = {trigram : np.array(ranks, dtype=np.int64) for trigram, ranks in postings.items()
+                                  if len(ranks) <= TRIGRAM_MAX_POSTINGS}
+        # number of indexed (not too common) trigrams of each name, the only ones similarities are computed on
+        self.trigrams_counts = np.zeros(len(ranked_items), dtype=np.int64)
+        for ranks in self.trigrams_postings.values():
+            self.trigrams_counts[ranks] += 1
+
+    def _prefix_ranks(self, prefix):
+        """Sorted ranks of the names having a token starting with the prefix"""
+        start = bisect_left(self.tokens, prefix)
+        ranks = self.tokens_ranks[start:bisect_left(self.tokens, prefix + "\U0010ffff", lo=start)]
+        if len(ranks) > PREFIX_MASK_RATIO * len(self.ranked_ids):
+            # for very common prefixes, a mask over all the names is cheaper than sorting the ranks
+            mask = np.zeros(len(self.ranked_ids), dtype=bool)
+            mask[ranks] = True
+            return np.flatnonzero(mask)
+        return np.unique(ranks)
+
+    def _prefix_search(self, query_tokens, limit):
+        # the names must have a token starting with each query token: the ranks arrays of all the
+        # query tokens are intersected, rarest first, and being sorted, the best matches come first
+        tokens_ranks = sorted((self._prefix_ranks(token) for token in set(query_tokens)), key=len)
+        matching_ranks = tokens_ranks[0]
+        for ranks in tokens_ranks[1:]:
+            if not len(matching_ranks):
+                break
+            matching_ranks = np.intersect1d(matching_ranks, ranks, assume_unique=True)
+        return matching_ranks[:limit].tolist()
+
+    def _trigram_search(self, query_tokens, limit):
+        postings = [self.trigrams_postings[trigram] for trigram in trigrams(query_tokens)
+                    if trigram in self.trigrams_postings]
+        if not postings:
+            return []
+
+        ranks, shared_counts = np.unique(np.concatenate(postings), return_counts=True)
+        # jaccard similarity between the name's and the query's sets of indexed trigrams: the trigrams
+        # too common to be indexed are left out of both sides
+        similarities = shared_counts / (len(postings) + self.trigrams_counts[ranks] - shared_counts)
+        selected = similarities >= TRIGRAM_MIN_SIMILARITY
+        ranks, similarities = ranks[selected], similarities[selected]
+        # most similar first, shortest names first for equal similarities
+        return ranks[np.lexsort((ranks, -similarities))[:limit]].tolist()
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """Returns the list of (id, name) matching the query, best matches first.
+        An empty query matches every name"""
+        if limit <= 0:
+            return []
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return list(zip(self.ranked_ids[:limit], self.ranked_names[:limit]))
+
+        results = self._prefix_search(query_tokens, limit)
+        if len(results) < limit:
+            found = set(results)
+            results += [rank for rank in self._trigram_search(query_tokens, limit)
+                        if rank not in found][:limit - len(results)]
+
+        return [(self.ranked_ids[rank], self.ranked_names[rank]) for rank in results]
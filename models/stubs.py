@@ -50,4 +50,9 @@ ADVANCED_STATS_EMPTY_RESPONSE = {
         "avg_in_sentence": 0,
         "count": 0
     }
+}
+
+FACETS_EMPTY_RESPONSE = {
+    "authors": [],
+    "genres": []
 }
\ No newline at end of file